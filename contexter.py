@@ -21,14 +21,21 @@ __all__ += ['contextmanager', 'nested', 'closing', 'ContextDecorator',
 
 
 if sys.version_info < (3,):
-	eval(compile('def reraise(a): raise a[0], a[1], a[2]', '<py3fix>', 'exec'))
+    eval(compile('def reraise(a): raise a[0], a[1], a[2]', '<py3fix>', 'exec'))
 else:
     def reraise(exc):
         raise exc[1].with_traceback(exc[2])
 
 
 
-_not_a_context = TypeError(
+_exc_info = sys.exc_info
+
+# Finalizer kinds stored with each stack entry.
+_EXIT, _CLOSE = 0, 1
+
+_no_scope = "Not within a `with` block of this context manager."
+
+_not_a_context = (
     "Only context managers (implementing `__enter__` and `__exit__`)"
     " or objects with a `close` method are supported.")
 
@@ -46,17 +53,24 @@ class Contexter(object):
         Closeable objects (implement `close()`) can be added directly, without
         a `contextlib.closing` wrapper.
     """
-    __slots__ = '_prepared', '_context_stack'
+    # Each scope on the _context_stack is a (values, finalizers) pair of
+    # parallel lists. The lists of the inner-most scope are cached in slots.
+    __slots__ = '_top_values', '_top_finalizers', '_context_stack', '_prepared'
 
     def __init__(self, *contexts):
         """ Create a new context manager with any number of child contexts. """
-        self._prepared = list(contexts)
+        self._prepared = contexts
         self._context_stack = []
+        self._top_values = self._top_finalizers = None
 
     def __call__(self, *contexts):
         """ Add any number of additional contexts to the current scope. """
+        if len(contexts) == 1:
+            self.append(contexts[0])
+            return self
+        push = self.append
         for context in contexts:
-            self << context
+            push(context)
         return self
 
     def append(self, context):
@@ -66,15 +80,30 @@ class Contexter(object):
                 `__exit__`, or a closeable object.
             @return The return value of `__enter__()`, or the closeable itself.
         """
-        if hasattr(context, '__enter__') and hasattr(context, '__exit__'):
-            value = context.__enter__()
-            self._context_stack[-1].append((context, value))
-            return value
-        elif hasattr(context, 'close'):
-            self._context_stack[-1].append((context, context))
+        values = self._top_values
+        if values is None:
+            raise IndexError(_no_scope)
+        try:
+            exit = context.__exit__
+            enter = context.__enter__
+        except AttributeError:
+            enter = None
+        if enter is None:
+            # Raise outside of the except blocks, so the AttributeError is
+            # not chained to the TypeError.
+            try:
+                close = context.close
+            except AttributeError:
+                close = None
+            if close is None:
+                raise TypeError(_not_a_context)
+            values.append(context)
+            self._top_finalizers.append((close, _CLOSE))
             return context
-        else:
-            raise _not_a_context
+        value = enter()
+        values.append(value)
+        self._top_finalizers.append((exit, _EXIT))
+        return value
 
     __lshift__ = append
 
@@ -89,7 +118,7 @@ class Contexter(object):
             @param stack: The scope stack index. (default: -1)
             @return List of manmaged values.
         """
-        return [value for context, value in self._context_stack[stack]]
+        return list(self._context_stack[stack][0])
 
     def value(self, index, stack=-1):
         """ Return a specific context value.
@@ -98,70 +127,75 @@ class Contexter(object):
             @param stack: The scope stack index. (default: -1)
             @return List of manmaged values.
         """
-        if isinstance(index, slice):
-            return [x[1] for x in self._context_stack[stack][index]]
-        else:
-            return self._context_stack[stack][index][1]
+        return self._context_stack[stack][0][index]
 
-    __getitem__ = value
+    def __getitem__(self, index):
+        """ Same as `value(index)`, but always for the inner-most scope. """
+        values = self._top_values
+        if values is None:
+            raise IndexError(_no_scope)
+        return values[index]
 
     def __len__(self):
         """ Number of contexts in the current scope. """
-        return len(self._context_stack[-1])
+        values = self._top_values
+        if values is None:
+            raise IndexError(_no_scope)
+        return len(values)
 
     def __enter__(self):
-        self._context_stack.append([])
-        if self._context_stack == [[]]:
+        self._top_values = values = []
+        self._top_finalizers = finalizers = []
+        self._context_stack.append((values, finalizers))
+        if len(self._context_stack) == 1:
+            push = self.append
             for context in self._prepared:
-                self << context
+                push(context)
         return self
 
     def __exit__(self, *exc):
-        contexts = self._context_stack.pop()
-        for context, value in contexts[::-1]:
+        finalizers = self._context_stack.pop()[1]
+        self._sync_top()
+        pending = exc[0] is not None
+        for finalizer, kind in reversed(finalizers):
             try:
-                if hasattr(context, '__exit__'):
-                    if(context.__exit__(*exc)):
+                if kind == _EXIT:
+                    if not pending:
+                        finalizer(None, None, None)
+                    elif finalizer(*exc):
                         exc = (None, None, None)
-                elif hasattr(context, 'close'):
-                    context.close()
+                        pending = False
                 else:
-                    raise _not_a_context
+                    finalizer()
             except:
-                exc = sys.exc_info()
+                exc = _exc_info()
+                pending = True
 
-        if exc != (None, None, None):
+        if pending:
             reraise(exc)
 
+    def _push_raw(self, value, finalizer, kind):
+        """ Add a finalizer of the given kind (`_EXIT` or `_CLOSE`) to the
+            current scope without entering anything. """
+        values = self._top_values
+        if values is None:
+            raise IndexError(_no_scope)
+        values.append(value)
+        self._top_finalizers.append((finalizer, kind))
+        return value
+
+    def _sync_top(self):
+        """ Point the cached top lists at the current inner-most scope. """
+        if self._context_stack:
+            self._top_values, self._top_finalizers = self._context_stack[-1]
+        else:
+            self._top_values = self._top_finalizers = None
+
     def close(self):
         warnings.warn("Do not call close() on a Contexter.", DeprecationWarning)
         self.__exit__(None, None, None)
 
 
-class _ExitDummy(object):
-    def __init__(self, exit):
-        self.exit = exit
-
-    def __enter__(self):
-        return self
-
-    def __exit__(self, *exc):
-        return self.exit(*exc)
-
-
-class _CloseDummy(object):
-    def __init__(self, callback, args, kwds):
-        self.callback = callback
-        self.args = args
-        self.kwds = kwds
-
-    def __call__(self, *args, **kwds):
-        return self.callback(*args, **kwds)
-
-    def close(self):
-        self.callback(*self.args, **self.kwds)
-
-
 contextmanager = contextlib.contextmanager
 
 
@@ -169,6 +203,16 @@ class ExitStack(Contexter):
     """ Context manager for dynamic management of a stack of exit callbacks.
     """
 
+    # True while the outer-most scope was handed over by pop_all() instead of
+    # being opened by a `with` statement. The next `__enter__` adopts it.
+    _adopted = False
+
+    def __enter__(self):
+        if self._adopted:
+            self._adopted = False
+            return self
+        return Contexter.__enter__(self)
+
     def enter_context(self, cm):
         """ Enters the supplied context manager
 
@@ -185,20 +229,43 @@ class ExitStack(Contexter):
             Also accepts any object with an __exit__ method (registering a call
             to the method instead of the object itself)
         """
-        return self << _ExitDummy(exit)
+        exit_method = getattr(type(exit), '__exit__', None)
+        if exit_method is None:
+            return self._push_raw(exit, exit, _EXIT)
+        return self._push_raw(exit, exit_method.__get__(exit, type(exit)), _EXIT)
 
     def callback(self, callback, *args, **kwds):
         """ Registers an arbitrary callback and arguments.
 
             Cannot suppress exceptions.
         """
-        return self << _CloseDummy(callback, args, kwds)
+        if args or kwds:
+            finalizer = functools.partial(callback, *args, **kwds)
+        else:
+            finalizer = callback
+        return self._push_raw(callback, finalizer, _CLOSE)
 
     def pop_all(self):
         """ Preserve the context stack by transferring it to a new instance """
         ret = ExitStack()
-        ret._context_stack.append(self._context_stack.pop())
-        self._context_stack.append([])
+        ret._context_stack.append(self._context_stack[-1])
+        ret._sync_top()
+        ret._adopted = True
+        self._context_stack[-1] = ([], [])
+        self._sync_top()
+        return ret
+
+    def close(self):
+        """ Immediately unwind the current scope. """
+        stack = self._context_stack
+        if not stack:
+            return
+        if self._adopted:
+            self._adopted = False
+        else:
+            # Leave an empty scope for the enclosing `with` statement to exit.
+            stack.insert(-1, ([], []))
+        self.__exit__(None, None, None)
 
 
 def closing(thing):
@@ -213,7 +280,11 @@ class ContextDecorator(object):
     """ A base class or mixin that enables context managers to work as
         decorators. """
     def __call__(self, func):
-        @functools.wraps(func)
+        return functools.wraps(func)(self.fast_call(func))
+
+    def fast_call(self, func):
+        """ Same as using the context manager as a decorator, but do not copy
+            any metadata (name, docstring, ...) from the wrapped function. """
         def inner(*args, **kwds):
             with self:
                 return func(*args, **kwds)
@@ -248,6 +319,7 @@ def test_context_stacks():
         v1 = ctx.append(TestContext('b'))
         assert ctx.values() == ['a','b']
         assert v1 == 'b'
+        assert ctx() is ctx
         v2 = ctx << TestContext('c')
         assert ctx.values() == ['a','b','c']
         assert v2 == 'c'
@@ -276,3 +348,104 @@ def test_context_stacks():
         assert a.entered
         assert b.entered and b.exited
         assert not c.entered
+
+    class Suppress(TestContext):
+        def __exit__(self, *a):
+            self.exited = a
+            return True
+
+    class BadClose(object):
+        def close(self):
+            raise ValueError('close')
+
+    try:
+        with Contexter() as ctx:
+            ctx << object()
+    except TypeError:
+        assert getattr(sys.exc_info()[1], '__context__', None) is None
+    else:
+        assert False, 'TypeError expected'
+
+    ctx, a = Contexter(), TestContext('a')
+    for attempt in (lambda: len(ctx), lambda: ctx[0], lambda: ctx << a):
+        try:
+            attempt()
+        except IndexError:
+            pass
+        else:
+            assert False, 'IndexError expected'
+    assert not a.entered
+
+    a, b, c = TestContext('a'), Suppress('b'), TestContext('c')
+    with Contexter(a, b, BadClose(), c):
+        pass
+    assert c.exited == (None, None, None)
+    assert b.exited[0] is ValueError
+    assert a.exited == (None, None, None)
+
+
+def test_exit_stack():
+    log = []
+
+    def exit(*exc):
+        log.append(exc)
+
+    with ExitStack() as stack:
+        assert stack.callback(log.append, 'callback') == log.append
+        assert stack.push(exit) is exit
+        stack.callback(log.append, 'first')
+        assert len(stack) == 3
+    assert log == ['first', (None, None, None), 'callback']
+
+    class Pushed(object):
+        def __enter__(self):
+            assert False, '__enter__ should not be called'
+
+        def __exit__(self, *exc):
+            log.append(self)
+
+    cm = Pushed()
+    with ExitStack() as stack:
+        assert stack.push(cm) is cm
+    assert log[-1] is cm
+
+    with ExitStack() as stack:
+        stack.callback(log.append, 'popped')
+        preserved = stack.pop_all()
+        assert len(stack) == 0
+        assert len(preserved) == 1
+    assert 'popped' not in log
+    with preserved:
+        assert len(preserved) == 1
+    assert log[-1] == 'popped'
+
+    with ExitStack() as stack:
+        stack.callback(log.append, 'closed')
+        stack.pop_all().close()
+        assert log[-1] == 'closed'
+        stack.callback(log.append, 'inner')
+        stack.close()
+        assert log[-1] == 'inner'
+        assert len(stack) == 0
+
+
+def test_context_decorator():
+    log = []
+
+    class Logged(ContextDecorator):
+        def __enter__(self):
+            log.append('enter')
+
+        def __exit__(self, *exc):
+            log.append('exit')
+
+    def func(x):
+        """ doc """
+        log.append(x)
+        return x
+
+    wrapped = Logged()(func)
+    assert wrapped.__name__ == 'func' and wrapped.__doc__ == func.__doc__
+    assert wrapped(1) == 1
+    assert Logged().fast_call(func)(2) == 2
+    assert log == ['enter', 1, 'exit', 'enter', 2, 'exit']
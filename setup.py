@@ -1,16 +1,57 @@
 #!/usr/bin/env python
 
+import os
 import sys
 try:
-    from setuptools import setup
+    from setuptools import setup, Extension
+    from setuptools.command.build_ext import build_ext
 except ImportError:
-    from distutils.core import setup
+    from distutils.core import setup, Extension
+    from distutils.command.build_ext import build_ext
+from distutils.errors import CCompilerError, DistutilsExecError, \
+                             DistutilsPlatformError
 
 if sys.version_info < (2,5):
     raise NotImplementedError("Sorry, you need at least Python 2.5 or Python 3.x")
 
 import contexter
 
+# Compile the module to a C extension if possible: With Cython if it is
+# available, otherwise from a contexter.c shipped with the sdist. The
+# pure-Python module is always installed, and is used on its own if there is
+# nothing to compile or the compiler fails (see optional_build_ext).
+try:
+    from Cython.Build import cythonize
+    ext_modules = cythonize('contexter.py', compiler_directives={
+        'language_level': sys.version_info[0]})
+except ImportError:
+    if os.path.exists('contexter.c'):
+        ext_modules = [Extension('contexter', ['contexter.c'])]
+    else:
+        ext_modules = []
+
+_build_errors = (CCompilerError, DistutilsExecError, DistutilsPlatformError)
+
+
+class optional_build_ext(build_ext):
+    """ Skip the C extension instead of failing if it cannot be built. """
+
+    def run(self):
+        try:
+            build_ext.run(self)
+        except _build_errors:
+            self._skip(sys.exc_info()[1])
+
+    def build_extension(self, ext):
+        try:
+            build_ext.build_extension(self, ext)
+        except _build_errors:
+            self._skip(sys.exc_info()[1])
+
+    def _skip(self, error):
+        sys.stderr.write("WARNING: Could not compile the C extension (%s)."
+                         " Falling back to pure Python.\n" % error)
+
 with contexter.Contexter() as ctx:
     long_description = '  '.join(ctx << open('README.rst')).rstrip()
 
@@ -22,6 +63,8 @@ setup(name='contexter',
       author_email='marc@gsites.de',
       url='https://bitbucket.org/defnull/contexter',
       py_modules=['contexter'],
+      ext_modules=ext_modules,
+      cmdclass={'build_ext': optional_build_ext},
       license='MIT',
       platforms = 'any',
       classifiers=['Development Status :: 4 - Beta',